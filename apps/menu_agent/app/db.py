@@ -2,23 +2,201 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from . import models  # noqa: F401  (registers tables on SQLModel.metadata)
 
 DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DATA_DIR / "menu_agent.sqlite3"
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
+# aiosqlite runs each connection on its own thread, so handlers await queries
+# instead of pinning a threadpool worker. Beyond pool_size + max_overflow,
+# requests wait for a free connection.
+engine = create_async_engine(
+    f"sqlite+aiosqlite:///{DB_PATH}",
     echo=False,
-    connect_args={"check_same_thread": False},
+    # cached_statements: per-connection sqlite3 prepared-statement cache, so
+    # hot SELECTs skip re-preparing. query_cache_size: SQLAlchemy's
+    # compiled-SQL cache, sized for the filter combinations list_items builds.
+    connect_args={"check_same_thread": False, "cached_statements": 256},
+    query_cache_size=1200,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+# WAL lets readers run alongside a writer; synchronous=NORMAL is durable under
+# WAL and avoids an fsync per commit. Cache/mmap sizes keep hot pages in memory.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",  # KiB, i.e. ~20 MB
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA foreign_keys=ON",
 )
 
 
-def init_db() -> None:
-    SQLModel.metadata.create_all(engine)
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    cur = dbapi_conn.cursor()
+    try:
+        for pragma in _PRAGMAS:
+            cur.execute(pragma)
+    finally:
+        cur.close()
+
+
+# External-content FTS5 index over menu items; the triggers keep it in sync
+# with the menuitem table so search never scans rows in Python.
+_FTS_COLUMNS = "name, description"
+
+_FTS_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE menuitem_fts USING fts5(
+        {_FTS_COLUMNS},
+        content='menuitem', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menuitem_fts_ai AFTER INSERT ON menuitem BEGIN
+        INSERT INTO menuitem_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menuitem_fts_ad AFTER DELETE ON menuitem BEGIN
+        INSERT INTO menuitem_fts(menuitem_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS menuitem_fts_au AFTER UPDATE ON menuitem BEGIN
+        INSERT INTO menuitem_fts(menuitem_fts, rowid, {_FTS_COLUMNS})
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO menuitem_fts(rowid, {_FTS_COLUMNS})
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+]
+
+
+async def _init_fts(conn) -> None:
+    exists = (
+        await conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type='table' AND name='menuitem_fts'")
+        )
+    ).first()
+    if exists:
+        return
+    for ddl in _FTS_SCHEMA:
+        await conn.execute(text(ddl))
+    # Index rows that predate the FTS table.
+    await conn.execute(text("INSERT INTO menuitem_fts(menuitem_fts) VALUES ('rebuild')"))
+
+
+async def _drop_fts(conn) -> None:
+    for trigger in ("menuitem_fts_ai", "menuitem_fts_ad", "menuitem_fts_au"):
+        await conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+    await conn.execute(text("DROP TABLE IF EXISTS menuitem_fts"))
+
+
+async def _migrate_csv_tags(conn) -> None:
+    """Move legacy comma-separated region/flavor columns into Tag/MenuItemTag."""
+    cols = {row[1] for row in await conn.execute(text("PRAGMA table_info(menuitem)"))}
+    if "region_tags" not in cols:
+        return
+
+    from .service import set_item_tags
+
+    # The old FTS index covered the CSV columns; it is recreated by _init_fts.
+    await _drop_fts(conn)
+    rows = (await conn.execute(text("SELECT id, region_tags, flavor_tags FROM menuitem"))).all()
+    async with AsyncSession(bind=conn) as session:
+        for item_id, regions, flavors in rows:
+            await set_item_tags(
+                session,
+                item_id,
+                regions=(regions or "").split(","),
+                flavors=(flavors or "").split(","),
+            )
+        await session.flush()
+    await conn.execute(text("ALTER TABLE menuitem DROP COLUMN region_tags"))
+    await conn.execute(text("ALTER TABLE menuitem DROP COLUMN flavor_tags"))
+
+
+async def _rekey_tags(conn) -> None:
+    """Re-key tags stored before keys were casefolded (lower() kept e.g. "ß")."""
+    from .service import _normalize_tag
+
+    # lower() and casefold() agree on ASCII, so only non-ASCII keys can change.
+    rows = (await conn.execute(text("SELECT id, kind, key FROM tag WHERE key GLOB '*[^ -~]*'"))).all()
+    for tag_id, kind, key in rows:
+        new_key = _normalize_tag(key)
+        if new_key == key:
+            continue
+        target = (
+            await conn.execute(
+                text("SELECT id FROM tag WHERE kind = :kind AND key = :key"),
+                {"kind": kind, "key": new_key},
+            )
+        ).scalar()
+        if target is None:
+            await conn.execute(text("UPDATE tag SET key = :key WHERE id = :id"), {"key": new_key, "id": tag_id})
+            continue
+        # Both spellings exist: fold the old tag's links into the new one.
+        await conn.execute(
+            text(
+                "INSERT OR IGNORE INTO menuitemtag (item_id, tag_id) "
+                "SELECT item_id, :target FROM menuitemtag WHERE tag_id = :id"
+            ),
+            {"target": target, "id": tag_id},
+        )
+        await conn.execute(text("DELETE FROM menuitemtag WHERE tag_id = :id"), {"id": tag_id})
+        await conn.execute(text("DELETE FROM tag WHERE id = :id"), {"id": tag_id})
+
+
+def _ensure_indexes(conn) -> None:
+    # Superseded by ix_mi_rest_name (restaurant_id is its leading column).
+    conn.execute(text("DROP INDEX IF EXISTS ix_menuitem_restaurant_id"))
+    # create_all only builds indexes together with new tables.
+    for tbl in SQLModel.metadata.sorted_tables:
+        for index in tbl.indexes:
+            index.create(conn, checkfirst=True)
+
+
+async def init_db() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await _migrate_csv_tags(conn)
+        await _rekey_tags(conn)
+        await conn.run_sync(_ensure_indexes)
+        await _init_fts(conn)
+
+
+async def reset_db() -> None:
+    """Drop and recreate every table (O(pages), unlike row-by-row DELETEs)."""
+    async with engine.connect() as conn:
+        # With foreign keys on, DROP TABLE runs an implicit DELETE first.
+        await conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        try:
+            await _drop_fts(conn)
+            await conn.run_sync(SQLModel.metadata.drop_all)
+            await conn.commit()
+        finally:
+            await conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+    await init_db()
 
 
-def get_session():
-    with Session(engine) as session:
+async def get_session():
+    # expire_on_commit=False: async sessions can't lazily reload attributes.
+    async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
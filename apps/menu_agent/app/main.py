@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from fastapi import Depends, FastAPI, HTTPException, Query
-from sqlalchemy import text
-from sqlmodel import Session
+import hashlib
+import json
+import time
 
-from .db import DB_PATH, get_session, init_db
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from sqlalchemy import Row
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .db import DB_PATH, get_session, init_db, reset_db
 from .models import MenuItem, Restaurant
 from .schemas import (
     HealthResponse,
@@ -14,18 +18,26 @@ from .schemas import (
     RestaurantCreate,
     RestaurantRead,
 )
-from .service import list_items, list_restaurants, recommend_items
+from .service import (
+    get_tags_by_item,
+    list_items,
+    list_restaurants,
+    recommend_items,
+    set_item_tags,
+)
 
 app = FastAPI(title="Menu Agent", version="0.1.0")
 
 
 @app.on_event("startup")
-def _startup():
-    init_db()
+async def _startup():
+    await init_db()
 
 
-def _item_to_read(it: MenuItem) -> MenuItemRead:
-    return MenuItemRead(
+# Read models are built from data the server itself produced, so they skip
+# pydantic validation via model_construct.
+def _item_to_read(it: MenuItem | Row, tags: dict[str, list[str]]) -> MenuItemRead:
+    return MenuItemRead.model_construct(
         id=it.id,
         restaurant_id=it.restaurant_id,
         name=it.name,
@@ -33,38 +45,87 @@ def _item_to_read(it: MenuItem) -> MenuItemRead:
         price=round(it.price_cents / 100.0, 2),
         currency=it.currency,
         is_signature=it.is_signature,
-        region_tags=sorted(list(it.regions())),
-        flavor_tags=sorted(list(it.flavors())),
+        region_tags=tags["region"],
+        flavor_tags=tags["flavor"],
     )
 
 
+def _restaurant_to_read(r: Restaurant) -> RestaurantRead:
+    return RestaurantRead.model_construct(id=r.id, name=r.name, city=r.city, cuisine_hint=r.cuisine_hint)
+
+
 @app.get("/health", response_model=HealthResponse)
-def health():
+async def health():
     return HealthResponse(ok=True, db=str(DB_PATH))
 
 
+# The restaurant list is read far more often than it changes. Keep the last
+# result in memory, keyed by a version bumped on every local write; the TTL
+# bounds staleness for writes from other processes (seed script, workers).
+_RESTAURANTS_TTL_S = 30.0
+_rest_version = 0
+_rest_cache: tuple[int, float, str, list[RestaurantRead]] | None = None
+
+
+def _bump_restaurants() -> None:
+    global _rest_version
+    _rest_version += 1
+
+
+async def _cached_restaurants(session: AsyncSession) -> tuple[str, list[RestaurantRead]]:
+    global _rest_cache
+    now = time.monotonic()
+    if _rest_cache is None or _rest_cache[0] != _rest_version or _rest_cache[1] <= now:
+        version = _rest_version
+        rs = await list_restaurants(session)
+        payload = [_restaurant_to_read(r) for r in rs]
+        body = json.dumps([r.model_dump() for r in payload], sort_keys=True).encode()
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        _rest_cache = (version, now + _RESTAURANTS_TTL_S, etag, payload)
+    return _rest_cache[2], _rest_cache[3]
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # RFC 9110 If-None-Match: "*" or a comma-separated list, weak comparison.
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 @app.get("/restaurants", response_model=list[RestaurantRead])
-def get_restaurants(session: Session = Depends(get_session)):
-    rs = list_restaurants(session)
-    return [RestaurantRead(id=r.id, name=r.name, city=r.city, cuisine_hint=r.cuisine_hint) for r in rs]
+async def get_restaurants(
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+):
+    etag, payload = await _cached_restaurants(session)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
 
 
 @app.post("/restaurants", response_model=RestaurantRead)
-def create_restaurant(payload: RestaurantCreate, session: Session = Depends(get_session)):
+async def create_restaurant(payload: RestaurantCreate, session: AsyncSession = Depends(get_session)):
     r = Restaurant(name=payload.name, city=payload.city, cuisine_hint=payload.cuisine_hint)
     session.add(r)
-    session.commit()
-    session.refresh(r)
-    return RestaurantRead(id=r.id, name=r.name, city=r.city, cuisine_hint=r.cuisine_hint)
+    await session.commit()
+    _bump_restaurants()
+    await session.refresh(r)
+    return _restaurant_to_read(r)
 
 
 @app.post("/restaurants/{restaurant_id}/items", response_model=MenuItemRead)
-def create_item(
+async def create_item(
     restaurant_id: int,
     payload: MenuItemCreate,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
-    r = session.get(Restaurant, restaurant_id)
+    r = await session.get(Restaurant, restaurant_id)
     if not r:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
@@ -75,27 +136,32 @@ def create_item(
         price_cents=int(round(payload.price * 100)),
         currency=payload.currency,
         is_signature=payload.is_signature,
-        region_tags=",".join([t.strip() for t in payload.region_tags if t.strip()]),
-        flavor_tags=",".join([t.strip() for t in payload.flavor_tags if t.strip()]),
     )
     session.add(it)
-    session.commit()
-    session.refresh(it)
-    return _item_to_read(it)
+    await session.flush()
+    await set_item_tags(
+        session,
+        it.id,
+        regions=payload.region_tags,
+        flavors=payload.flavor_tags,
+    )
+    await session.commit()
+    await session.refresh(it)
+    return _item_to_read(it, (await get_tags_by_item(session, [it.id]))[it.id])
 
 
 @app.get("/items", response_model=list[MenuItemRead])
-def get_items(
+async def get_items(
     restaurant_id: int | None = None,
     q: str | None = None,
     region: str | None = None,
     flavor: str | None = None,
     is_signature: bool | None = None,
     max_price: float | None = Query(default=None, ge=0),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     max_price_cents = None if max_price is None else int(round(max_price * 100))
-    items = list_items(
+    items = await list_items(
         session,
         restaurant_id=restaurant_id,
         q=q,
@@ -104,21 +170,22 @@ def get_items(
         is_signature=is_signature,
         max_price_cents=max_price_cents,
     )
-    return [_item_to_read(it) for it in items]
+    tags = await get_tags_by_item(session, [it.id for it in items])
+    return [_item_to_read(it, tags[it.id]) for it in items]
 
 
 @app.get("/recommendations", response_model=RecommendationResponse)
-def get_recommendations(
+async def get_recommendations(
     restaurant_id: int | None = None,
     region: str | None = None,
     flavor: str | None = None,
     max_price: float | None = Query(default=None, ge=0),
     limit: int = Query(default=3, ge=1, le=10),
     prefer_signature: bool = True,
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
     max_price_cents = None if max_price is None else int(round(max_price * 100))
-    items = recommend_items(
+    items = await recommend_items(
         session,
         restaurant_id=restaurant_id,
         region=region,
@@ -132,17 +199,16 @@ def get_recommendations(
     if not items:
         note = "No matching items. Try removing filters (region/flavor/max_price)."
 
-    return RecommendationResponse(items=[_item_to_read(it) for it in items], note=note)
+    tags = await get_tags_by_item(session, [it.id for it in items])
+    return RecommendationResponse(items=[_item_to_read(it, tags[it.id]) for it in items], note=note)
 
 
 @app.delete("/danger/reset")
-def reset_all_data(confirm: bool = False, session: Session = Depends(get_session)):
+async def reset_all_data(confirm: bool = False):
     """Dangerous: wipe all data. Requires confirm=true."""
     if not confirm:
         raise HTTPException(status_code=400, detail="Pass confirm=true")
 
-    # order matters (FK)
-    session.exec(text("DELETE FROM menuitem"))
-    session.exec(text("DELETE FROM restaurant"))
-    session.commit()
+    await reset_db()
+    _bump_restaurants()
     return {"ok": True}
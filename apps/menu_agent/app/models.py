@@ -3,6 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index, UniqueConstraint, text
 from sqlmodel import Field, SQLModel
 
 
@@ -15,8 +16,16 @@ class Restaurant(SQLModel, table=True):
 
 
 class MenuItem(SQLModel, table=True):
+    # Match list_items: filter on restaurant_id and order by (restaurant_id,
+    # name) straight off an index, no temp B-tree sort.
+    __table_args__ = (
+        Index("ix_mi_rest_name", "restaurant_id", "name"),
+        Index("ix_mi_price", "price_cents"),
+        Index("ix_mi_signature_partial", "restaurant_id", "name", sqlite_where=text("is_signature = 1")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    restaurant_id: int = Field(index=True, foreign_key="restaurant.id")
+    restaurant_id: int = Field(foreign_key="restaurant.id")
 
     name: str
     description: str = ""
@@ -27,15 +36,22 @@ class MenuItem(SQLModel, table=True):
 
     is_signature: bool = False
 
-    # Comma-separated tags for simplicity.
-    # (If we later need many-to-many, we can normalize.)
-    region_tags: str = ""  # e.g. "Sichuan,Cantonese"
-    flavor_tags: str = ""  # e.g. "spicy,numbing,garlicky"
+    # Region/flavor tags live in Tag + MenuItemTag.
 
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
-    def regions(self) -> set[str]:
-        return {t.strip() for t in self.region_tags.split(",") if t.strip()}
 
-    def flavors(self) -> set[str]:
-        return {t.strip() for t in self.flavor_tags.split(",") if t.strip()}
+class Tag(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("kind", "key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # "region" | "flavor"
+    key: str  # normalized form used for matching, e.g. "hong_kong"
+    name: str  # display form as first entered, e.g. "Hong Kong"
+
+
+class MenuItemTag(SQLModel, table=True):
+    __table_args__ = (Index("ix_mit_tag_item", "tag_id", "item_id"),)
+
+    item_id: int = Field(foreign_key="menuitem.id", primary_key=True)
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class RestaurantCreate(BaseModel):
@@ -12,6 +12,8 @@ class RestaurantCreate(BaseModel):
 
 
 class RestaurantRead(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: int
     name: str
     city: str
@@ -29,6 +31,8 @@ class MenuItemCreate(BaseModel):
 
 
 class MenuItemRead(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: int
     restaurant_id: int
     name: str
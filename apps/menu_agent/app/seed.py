@@ -8,41 +8,54 @@ Run:
   python -m app.seed
 """
 
-from sqlmodel import Session, select
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .db import engine, init_db
 from .models import MenuItem, Restaurant
+from .service import set_item_tags
 
 
 def _cents(x: float) -> int:
     return int(round(x * 100))
 
 
-def main() -> None:
-    init_db()
+async def _insert_returning_ids(session: AsyncSession, model, rows: list[dict]) -> list[int]:
+    """Insert all rows in one executemany INSERT ... RETURNING id, in row order."""
+    now = datetime.utcnow()
+    for row in rows:
+        # Core-style inserts skip the model's default_factory.
+        row.setdefault("created_at", now)
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list((await session.exec(stmt, params=rows)).scalars())
+
 
-    with Session(engine) as session:
-        existing = session.exec(select(Restaurant)).first()
+async def _seed() -> None:
+    await init_db()
+
+    # One transaction for the whole seed: a single commit (and fsync).
+    async with AsyncSession(engine) as session, session.begin():
+        existing = (await session.exec(select(Restaurant))).first()
         if existing:
             print("DB already has data; skipping seed.")
             return
 
         restaurants = [
-            Restaurant(name="Sichuan House", city="New York", cuisine_hint="Sichuan / spicy"),
-            Restaurant(name="Canton Garden", city="San Francisco", cuisine_hint="Cantonese / dim sum"),
-            Restaurant(name="Trattoria Roma", city="Chicago", cuisine_hint="Italian"),
-            Restaurant(name="Burger & Smoke", city="Austin", cuisine_hint="American / BBQ"),
+            dict(name="Sichuan House", city="New York", cuisine_hint="Sichuan / spicy"),
+            dict(name="Canton Garden", city="San Francisco", cuisine_hint="Cantonese / dim sum"),
+            dict(name="Trattoria Roma", city="Chicago", cuisine_hint="Italian"),
+            dict(name="Burger & Smoke", city="Austin", cuisine_hint="American / BBQ"),
         ]
-        for r in restaurants:
-            session.add(r)
-        session.commit()
-        for r in restaurants:
-            session.refresh(r)
+        restaurant_ids = await _insert_returning_ids(session, Restaurant, restaurants)
 
         items = [
             # Sichuan
-            MenuItem(
-                restaurant_id=restaurants[0].id,
+            dict(
+                restaurant_id=restaurant_ids[0],
                 name="Mapo Tofu",
                 description="Soft tofu in spicy chili-bean sauce with minced meat and Sichuan pepper.",
                 price_cents=_cents(14.5),
@@ -51,8 +64,8 @@ def main() -> None:
                 region_tags="Sichuan",
                 flavor_tags="spicy,numbing,savory",
             ),
-            MenuItem(
-                restaurant_id=restaurants[0].id,
+            dict(
+                restaurant_id=restaurant_ids[0],
                 name="Dan Dan Noodles",
                 description="Wheat noodles with sesame-chili sauce, minced pork, and pickled greens.",
                 price_cents=_cents(12.0),
@@ -61,8 +74,8 @@ def main() -> None:
                 region_tags="Sichuan",
                 flavor_tags="spicy,savory,nutty",
             ),
-            MenuItem(
-                restaurant_id=restaurants[0].id,
+            dict(
+                restaurant_id=restaurant_ids[0],
                 name="Kung Pao Chicken",
                 description="Stir-fried chicken with peanuts, dried chili, and a tangy-sweet sauce.",
                 price_cents=_cents(16.0),
@@ -72,8 +85,8 @@ def main() -> None:
                 flavor_tags="spicy,sweet,sour,nutty",
             ),
             # Cantonese
-            MenuItem(
-                restaurant_id=restaurants[1].id,
+            dict(
+                restaurant_id=restaurant_ids[1],
                 name="Har Gow (Shrimp Dumplings)",
                 description="Steamed shrimp dumplings with translucent wrapper.",
                 price_cents=_cents(8.5),
@@ -82,8 +95,8 @@ def main() -> None:
                 region_tags="Cantonese",
                 flavor_tags="savory,delicate",
             ),
-            MenuItem(
-                restaurant_id=restaurants[1].id,
+            dict(
+                restaurant_id=restaurant_ids[1],
                 name="Siomai (Pork & Shrimp)",
                 description="Open-faced steamed dumplings with pork and shrimp.",
                 price_cents=_cents(8.0),
@@ -92,8 +105,8 @@ def main() -> None:
                 region_tags="Cantonese",
                 flavor_tags="savory",
             ),
-            MenuItem(
-                restaurant_id=restaurants[1].id,
+            dict(
+                restaurant_id=restaurant_ids[1],
                 name="Roast Duck",
                 description="Crisp-skinned duck served with a light savory sauce.",
                 price_cents=_cents(24.0),
@@ -103,8 +116,8 @@ def main() -> None:
                 flavor_tags="savory,roasted",
             ),
             # Italian
-            MenuItem(
-                restaurant_id=restaurants[2].id,
+            dict(
+                restaurant_id=restaurant_ids[2],
                 name="Spaghetti Carbonara",
                 description="Spaghetti with egg, pecorino, guanciale, and black pepper.",
                 price_cents=_cents(18.0),
@@ -113,8 +126,8 @@ def main() -> None:
                 region_tags="Italian,Roman",
                 flavor_tags="savory,creamy,peppery",
             ),
-            MenuItem(
-                restaurant_id=restaurants[2].id,
+            dict(
+                restaurant_id=restaurant_ids[2],
                 name="Margherita Pizza",
                 description="Tomato, mozzarella, basil, olive oil.",
                 price_cents=_cents(17.0),
@@ -123,8 +136,8 @@ def main() -> None:
                 region_tags="Italian,Neapolitan",
                 flavor_tags="savory,herby",
             ),
-            MenuItem(
-                restaurant_id=restaurants[2].id,
+            dict(
+                restaurant_id=restaurant_ids[2],
                 name="Tiramisu",
                 description="Coffee-soaked ladyfingers with mascarpone cream and cocoa.",
                 price_cents=_cents(9.0),
@@ -134,8 +147,8 @@ def main() -> None:
                 flavor_tags="sweet,coffee,creamy",
             ),
             # American / BBQ
-            MenuItem(
-                restaurant_id=restaurants[3].id,
+            dict(
+                restaurant_id=restaurant_ids[3],
                 name="Smoked Brisket Plate",
                 description="Slow-smoked beef brisket with house BBQ sauce and sides.",
                 price_cents=_cents(22.0),
@@ -144,8 +157,8 @@ def main() -> None:
                 region_tags="American,BBQ,Texas",
                 flavor_tags="smoky,savory",
             ),
-            MenuItem(
-                restaurant_id=restaurants[3].id,
+            dict(
+                restaurant_id=restaurant_ids[3],
                 name="Cheeseburger",
                 description="Griddled beef patty, cheddar, lettuce, tomato, pickles.",
                 price_cents=_cents(13.0),
@@ -154,8 +167,8 @@ def main() -> None:
                 region_tags="American",
                 flavor_tags="savory",
             ),
-            MenuItem(
-                restaurant_id=restaurants[3].id,
+            dict(
+                restaurant_id=restaurant_ids[3],
                 name="Spicy Fried Chicken Sandwich",
                 description="Crispy chicken, spicy mayo, slaw, pickles.",
                 price_cents=_cents(14.0),
@@ -166,12 +179,27 @@ def main() -> None:
             ),
         ]
 
-        for it in items:
-            session.add(it)
-        session.commit()
+        tags = [
+            (row.pop("region_tags").split(","), row.pop("flavor_tags").split(","))
+            for row in items
+        ]
+        item_ids = await _insert_returning_ids(session, MenuItem, items)
+        for item_id, (regions, flavors) in zip(item_ids, tags):
+            await set_item_tags(session, item_id, regions=regions, flavors=flavors)
 
         print(f"Seeded {len(restaurants)} restaurants and {len(items)} items.")
 
 
+async def _run() -> None:
+    try:
+        await _seed()
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    asyncio.run(_run())
+
+
 if __name__ == "__main__":
     main()
@@ -1,69 +1,158 @@
 from __future__ import annotations
 
-import random
+from functools import lru_cache
 from typing import Iterable, Optional
 
-from sqlmodel import Session, select
+import numpy as np
+from sqlalchemy import Row, column, table, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from .models import MenuItem, Restaurant
+from .models import MenuItem, MenuItemTag, Restaurant, Tag
 
+_rng = np.random.default_rng()
 
+
+@lru_cache(maxsize=1024)
 def _normalize_tag(s: str) -> str:
-    return s.strip().lower().replace(" ", "_")
+    # casefold, not lower: full Unicode folding ("Straße" == "STRASSE").
+    return s.strip().casefold().replace(" ", "_")
+
+
+def _has_tag(kind: str, required: str):
+    # Served by the (kind, key) unique index and ix_mit_tag_item.
+    return (
+        select(MenuItemTag.item_id)
+        .join(Tag, Tag.id == MenuItemTag.tag_id)
+        .where(Tag.kind == kind, Tag.key == _normalize_tag(required))
+    )
+
+
+def _fts_query(q: str) -> str:
+    # Quote every token so user input can't be parsed as FTS5 syntax
+    # (AND/OR/NEAR, column filters, stray quotes) and prefix-match it.
+    tokens = q.split()
+    return " ".join('"' + t.replace('"', '""') + '"*' for t in tokens)
+
+
+_FTS_TABLE = table("menuitem_fts", column("rowid"))
+_FTS_MATCH = text("menuitem_fts MATCH :fts_q")
+
+
+def _fts_match(q: str):
+    return select(_FTS_TABLE.c.rowid).where(_FTS_MATCH.bindparams(fts_q=_fts_query(q)))
 
 
-def _tags_match(item_tags: Iterable[str], required: str) -> bool:
-    req = _normalize_tag(required)
-    return any(_normalize_tag(t) == req for t in item_tags)
+def _clean_tags(names: Iterable[str]) -> tuple[str, ...]:
+    # One strip per token; drop empties in the same pass.
+    return tuple(p for p in (t.strip() for t in names) if p)
 
 
-def list_restaurants(session: Session) -> list[Restaurant]:
-    return list(session.exec(select(Restaurant).order_by(Restaurant.name)))
+async def _get_or_create_tag_id(session: AsyncSession, kind: str, name: str) -> int:
+    key = _normalize_tag(name)
+    # Insert first and ignore conflicts: two requests introducing the same tag
+    # concurrently must not fail on the (kind, key) unique constraint, and
+    # taking the write lock up front avoids a stale-snapshot upgrade in WAL.
+    await session.exec(
+        sqlite_insert(Tag)
+        .values(kind=kind, key=key, name=name)
+        .on_conflict_do_nothing(index_elements=[Tag.kind, Tag.key])
+    )
+    return (await session.exec(select(Tag.id).where(Tag.kind == kind, Tag.key == key))).one()
+
+
+async def set_item_tags(
+    session: AsyncSession,
+    item_id: int,
+    regions: Iterable[str] = (),
+    flavors: Iterable[str] = (),
+) -> None:
+    """Attach region/flavor tags to an item, creating missing Tag rows."""
+    seen: set[int] = set()
+    for kind, names in (("region", regions), ("flavor", flavors)):
+        for name in _clean_tags(names):
+            tag_id = await _get_or_create_tag_id(session, kind, name)
+            if tag_id not in seen:
+                seen.add(tag_id)
+                session.add(MenuItemTag(item_id=item_id, tag_id=tag_id))
+
+
+async def get_tags_by_item(
+    session: AsyncSession, item_ids: Iterable[int]
+) -> dict[int, dict[str, list[str]]]:
+    """Load region/flavor tags for many items in one query."""
+    tags: dict[int, dict[str, list[str]]] = {
+        item_id: {"region": [], "flavor": []} for item_id in item_ids
+    }
+    if not tags:
+        return tags
+    stmt = (
+        select(MenuItemTag.item_id, Tag.kind, Tag.name)
+        .join(Tag, Tag.id == MenuItemTag.tag_id)
+        .where(MenuItemTag.item_id.in_(list(tags)))
+        .order_by(Tag.name)
+    )
+    for item_id, kind, name in await session.exec(stmt):
+        tags[item_id][kind].append(name)
+    return tags
+
+
+# list_items returns plain Rows of these columns rather than MenuItem objects:
+# the read path only serializes them, so ORM hydration and identity-map
+# bookkeeping per row is wasted work.
+_ITEM_COLS = (
+    MenuItem.id,
+    MenuItem.restaurant_id,
+    MenuItem.name,
+    MenuItem.description,
+    MenuItem.price_cents,
+    MenuItem.currency,
+    MenuItem.is_signature,
+)
+_ITEM_ORDER = (MenuItem.restaurant_id, MenuItem.name)
+
 
+async def list_restaurants(session: AsyncSession) -> list[Restaurant]:
+    return list(await session.exec(select(Restaurant).order_by(Restaurant.name)))
 
-def list_items(
-    session: Session,
+
+async def list_items(
+    session: AsyncSession,
     restaurant_id: Optional[int] = None,
     q: Optional[str] = None,
     region: Optional[str] = None,
     flavor: Optional[str] = None,
     is_signature: Optional[bool] = None,
     max_price_cents: Optional[int] = None,
-) -> list[MenuItem]:
-    stmt = select(MenuItem)
+) -> list[Row]:
+    stmt = select(*_ITEM_COLS)
     if restaurant_id is not None:
         stmt = stmt.where(MenuItem.restaurant_id == restaurant_id)
     if is_signature is not None:
         stmt = stmt.where(MenuItem.is_signature == is_signature)
     if max_price_cents is not None:
         stmt = stmt.where(MenuItem.price_cents <= max_price_cents)
-
-    items = list(session.exec(stmt.order_by(MenuItem.restaurant_id, MenuItem.name)))
-
-    if q:
-        ql = q.lower()
-        items = [
-            it
-            for it in items
-            if ql in it.name.lower() or (it.description and ql in it.description.lower())
-        ]
+    if q and q.strip():
+        stmt = stmt.where(MenuItem.id.in_(_fts_match(q)))
     if region:
-        items = [it for it in items if _tags_match(it.regions(), region)]
+        stmt = stmt.where(MenuItem.id.in_(_has_tag("region", region)))
     if flavor:
-        items = [it for it in items if _tags_match(it.flavors(), flavor)]
-    return items
+        stmt = stmt.where(MenuItem.id.in_(_has_tag("flavor", flavor)))
 
+    return list(await session.exec(stmt.order_by(*_ITEM_ORDER)))
 
-def recommend_items(
-    session: Session,
+
+async def recommend_items(
+    session: AsyncSession,
     restaurant_id: Optional[int] = None,
     region: Optional[str] = None,
     flavor: Optional[str] = None,
     max_price_cents: Optional[int] = None,
     limit: int = 3,
     prefer_signature: bool = True,
-) -> list[MenuItem]:
-    candidates = list_items(
+) -> list[Row]:
+    candidates = await list_items(
         session,
         restaurant_id=restaurant_id,
         region=region,
@@ -73,24 +162,16 @@ def recommend_items(
     if not candidates:
         return []
 
+    n = len(candidates)
+    prices = np.fromiter((it.price_cents for it in candidates), dtype=np.int64, count=n)
+    sig = np.fromiter((it.is_signature for it in candidates), dtype=bool, count=n)
+
     # Simple scoring: signature dishes get more weight.
-    weights = []
-    for it in candidates:
-        w = 1.0
-        if prefer_signature and it.is_signature:
-            w *= 3.0
-        # Slightly prefer mid-range prices (avoid always cheapest)
-        if it.price_cents > 0:
-            w *= 1.0 + min(it.price_cents / 5000.0, 1.0) * 0.2
-        weights.append(w)
-
-    chosen: list[MenuItem] = []
-    pool = candidates[:]
-    pool_weights = weights[:]
-    for _ in range(min(limit, len(pool))):
-        it = random.choices(pool, weights=pool_weights, k=1)[0]
-        idx = pool.index(it)
-        chosen.append(it)
-        pool.pop(idx)
-        pool_weights.pop(idx)
-    return chosen
+    weights = np.where(sig & prefer_signature, 3.0, 1.0)
+    # Slightly prefer mid-range prices (avoid always cheapest)
+    weights *= 1.0 + np.minimum(prices / 5000.0, 1.0) * 0.2
+
+    # Weighted sampling without replacement, same distribution as repeatedly
+    # drawing one item by weight and removing it.
+    picked = _rng.choice(n, size=min(limit, n), replace=False, p=weights / weights.sum())
+    return [candidates[i] for i in picked]
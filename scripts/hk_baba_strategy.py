@@ -25,12 +25,15 @@ NOT FINANCIAL ADVICE.
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
 import pandas as pd
 from futu import (
     OpenQuoteContext,
@@ -47,80 +50,162 @@ from futu import (
     ModifyOrderOp,
 )
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is the fallback
+    orjson = None
+
+
+# Order statuses that count as an outstanding order for duplicate checks.
+_ACTIVE_STATUSES = frozenset(
+    ["SUBMITTED", "SUBMITTING", "WAITING_SUBMIT", "SUBMIT_FAILED", "SUBMITTING_PART", "SUBMITTED_PART"]
+)
+
+# accinfo_query fields vary by account/API version; first match wins.
+_EQUITY_COLS = ("total_assets", "total_assets_hkd", "assets", "power")
+
 
 def now_ts() -> int:
     return int(time.time())
 
 
+def _iso_utc(ts: float) -> str:
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat()
+
+
 def round_hk_price(px: float) -> float:
     # Simplified tick rounding; real tick sizes vary.
     return round(px * 10) / 10.0
 
 
-def get_lot_size(code: str, host: str, port: int) -> int:
-    q = OpenQuoteContext(host=host, port=port)
-    try:
-        ret, data = q.get_stock_basicinfo(Market.HK, SecurityType.STOCK)
-        if ret == 0:
-            row = data[data["code"] == code]
-            if not row.empty:
-                return int(row.iloc[0]["lot_size"])
-    finally:
-        q.close()
-    return 100
+def get_lot_size(q: OpenQuoteContext, code: str) -> int | None:
+    ret, data = q.get_stock_basicinfo(Market.HK, SecurityType.STOCK)
+    if ret == 0:
+        row = data[data["code"] == code]
+        if not row.empty:
+            return int(row.iloc[0]["lot_size"])
+    return None
+
+
+# blake2b of the bytes last read from / written to each state path, so an
+# unchanged state is not rewritten on idle ticks.
+_state_hash: dict[str, bytes] = {}
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _dump_state(state: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    return json.dumps(state, indent=2, sort_keys=True).encode()
 
 
 def load_state(path: str) -> dict:
     if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            data = f.read()
+        _state_hash[path] = _digest(data)
+        if orjson is not None:
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass  # e.g. NaN/Infinity written by an older stdlib-json save
+        return json.loads(data)
     return {}
 
 
 def save_state(path: str, state: dict):
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = _dump_state(state)
+    h = _digest(data)
+    if _state_hash.get(path) == h and os.path.exists(path):
+        return
     tmp = path + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(state, f, indent=2, sort_keys=True)
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
     os.replace(tmp, path)
+    _state_hash[path] = h
 
 
-def sma(vals: list[float], period: int) -> float | None:
+def sma(vals: np.ndarray, period: int) -> float | None:
     if len(vals) < period:
         return None
-    return sum(vals[-period:]) / period
+    return float(vals[-period:].mean())
 
 
-def get_kline(code: str, host: str, port: int, count: int = 260) -> pd.DataFrame:
-    q = OpenQuoteContext(host=host, port=port)
-    try:
-        # Must subscribe before calling get_cur_kline on some OpenD setups.
-        ret, msg = q.subscribe([code], [SubType.K_DAY], is_first_push=False)
-        if ret != 0:
-            raise RuntimeError(f"subscribe K_DAY error: {msg}")
+def subscribe_kline(q: OpenQuoteContext, code: str):
+    # Must subscribe before calling get_cur_kline on some OpenD setups.
+    ret, msg = q.subscribe([code], [SubType.K_DAY], is_first_push=False)
+    if ret != 0:
+        raise RuntimeError(f"subscribe K_DAY error: {msg}")
+
+
+def get_kline(q: OpenQuoteContext, code: str, count: int = 260) -> pd.DataFrame:
+    """Daily kline; the caller keeps `code` subscribed (see subscribe_kline)."""
+    ret, data = q.get_cur_kline(code, num=count, ktype=KLType.K_DAY, autype=AuType.QFQ)
+    if ret != 0:
+        raise RuntimeError(f"get_cur_kline error: {data}")
+    return data
 
-        ret, data = q.get_cur_kline(code, num=count, ktype=KLType.K_DAY, autype=AuType.QFQ)
-        if ret != 0:
-            raise RuntimeError(f"get_cur_kline error: {data}")
-        return data
-    finally:
-        try:
-            q.unsubscribe([code], [SubType.K_DAY])
-        except Exception:
-            pass
-        q.close()
+
+def _read_kline_cache(path: str) -> pd.DataFrame | None:
+    if not os.path.exists(path):
+        return None
+    try:
+        return pd.read_parquet(path)
+    except Exception:  # missing pyarrow, corrupt file, ...
+        return None
 
 
-def get_last_price(code: str, host: str, port: int) -> tuple[float, str]:
-    q = OpenQuoteContext(host=host, port=port)
+def _write_kline_cache(path: str, k: pd.DataFrame):
+    # The cache is optional: never let it fail a trading tick.
+    tmp = path + ".tmp"
     try:
-        ret, snap = q.get_market_snapshot([code])
-        if ret != 0:
-            raise RuntimeError(f"snapshot error: {snap}")
-        row = snap.iloc[0]
-        return float(row["last_price"]), str(row.get("update_time"))
-    finally:
-        q.close()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        k.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+    except (ImportError, OSError):
+        pass  # no parquet engine installed / unwritable dir: run uncached
+
+
+def get_kline_cached(q: OpenQuoteContext, code: str, path: str, *, full: bool, count: int = 260) -> tuple[pd.DataFrame, bool]:
+    """Daily kline backed by a parquet cache at `path`.
+
+    Unless `full` is set (or there is no usable cache), only the last few bars
+    are fetched and merged into the cached frame. Returns (kline, fetched_full).
+    """
+    cached = None if full else _read_kline_cache(path)
+    if cached is None:
+        k = get_kline(q, code, count=count).sort_values("time_key").reset_index(drop=True)
+        full = True
+    else:
+        recent = get_kline(q, code, count=5)
+        # Match the cached dtypes (parquet round-trips strings differently) so
+        # an unchanged merge compares equal and the rewrite can be skipped.
+        recent = recent.astype({c: t for c, t in cached.dtypes.items() if c in recent.columns})
+        k = (
+            pd.concat([cached, recent], ignore_index=True)
+            .drop_duplicates("time_key", keep="last")
+            .sort_values("time_key")
+            .tail(count)
+            .reset_index(drop=True)
+        )
+        if k.equals(cached):
+            return k, False
+    _write_kline_cache(path, k)
+    return k, full
+
+
+def get_last_price(q: OpenQuoteContext, code: str) -> tuple[float, str]:
+    ret, snap = q.get_market_snapshot([code])
+    if ret != 0:
+        raise RuntimeError(f"snapshot error: {snap}")
+    row = snap.iloc[0]
+    return float(row["last_price"]), str(row.get("update_time"))
 
 
 def get_sim_acc_id(trd: OpenSecTradeContext) -> int:
@@ -131,18 +216,31 @@ def get_sim_acc_id(trd: OpenSecTradeContext) -> int:
     return int(sim["acc_id"])
 
 
+def _read_equity(trd: OpenSecTradeContext, acc_id: int) -> float | None:
+    try:
+        ret, df = trd.accinfo_query(trd_env=TrdEnv.SIMULATE, acc_id=acc_id)
+        if ret != 0 or df.empty:
+            return None
+        for col in _EQUITY_COLS:
+            if col in df.columns:
+                return float(df.iloc[0][col])
+    except Exception:
+        pass
+    return None
+
+
 def list_orders(trd: OpenSecTradeContext, acc_id: int, code: str) -> pd.DataFrame:
     ret, df = trd.order_list_query(trd_env=TrdEnv.SIMULATE, acc_id=acc_id)
     if ret != 0:
         raise RuntimeError(f"order_list_query error: {df}")
-    return df[df["code"] == code].copy()
+    return df.loc[df["code"].to_numpy() == code]
 
 
 def list_positions(trd: OpenSecTradeContext, acc_id: int, code: str) -> pd.DataFrame:
     ret, df = trd.position_list_query(trd_env=TrdEnv.SIMULATE, acc_id=acc_id)
     if ret != 0:
         raise RuntimeError(f"position_list_query error: {df}")
-    return df[df["code"] == code].copy()
+    return df.loc[df["code"].to_numpy() == code]
 
 
 def place_limit(trd: OpenSecTradeContext, acc_id: int, code: str, side: str, qty: int, price: float) -> tuple[int, pd.DataFrame | str]:
@@ -157,33 +255,74 @@ def place_limit(trd: OpenSecTradeContext, acc_id: int, code: str, side: str, qty
     )
 
 
-def ensure_order(trd: OpenSecTradeContext, acc_id: int, orders: pd.DataFrame, code: str, *, side: str, qty: int, price: float, price_tol: float = 0.05) -> tuple[bool, str]:
-    """Ensure there is an outstanding order similar to (side, qty, price).
+def active_side_prices(orders: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Prices of outstanding orders per side; unparseable prices become NaN (never match)."""
+    active = orders[orders["order_status"].isin(_ACTIVE_STATUSES)]
+    sides = active["trd_side"].astype(str)
+    return {
+        s: pd.to_numeric(active.loc[sides.eq(s), "price"], errors="coerce").to_numpy(np.float64, copy=False)
+        for s in ("BUY", "SELL")
+    }
+
+
+def needs_order(side_prices: dict[str, np.ndarray], *, side: str, qty: int, price: float, price_tol: float = 0.05) -> bool:
+    """True unless a similar outstanding order (side, price within tolerance) exists.
 
-    We treat orders with same side and price within tolerance as already present.
+    `side_prices` comes from active_side_prices() and is built once per run.
     """
     if qty <= 0:
-        return False, "qty<=0"
-
-    # Consider active-ish statuses only
-    active = orders[orders["order_status"].isin(["SUBMITTED", "SUBMITTING", "WAITING_SUBMIT", "SUBMIT_FAILED", "SUBMITTING_PART", "SUBMITTED_PART"])].copy()
-    if not active.empty:
-        same_side = active[active["trd_side"].astype(str) == side]
-        if not same_side.empty:
-            # if any order price close enough
-            for _, r in same_side.iterrows():
-                try:
-                    if abs(float(r["price"]) - price) <= price_tol:
-                        return False, "exists"
-                except Exception:
-                    continue
+        return False
+    return not np.any(np.abs(side_prices[side] - price) <= price_tol)
 
-    # Prefer the code from the open orders dataframe when available; otherwise use the provided code.
-    ret, resp = place_limit(trd, acc_id, orders.iloc[0]["code"] if len(orders) else code, side, qty, price)
-    if ret != 0:
-        return True, f"FAILED place {side} {qty}@{price}: {resp}"
-    oid = resp.iloc[0]["order_id"] if hasattr(resp, "iloc") else "?"
-    return True, f"PLACED {side} {qty}@{price} (order_id {oid})"
+
+def place_limits(trd: OpenSecTradeContext, acc_id: int, code: str, planned: list[tuple[str, int, float]]) -> list[str]:
+    """Place (side, qty, price) limit orders concurrently; one status line per order, in input order.
+
+    The trade context matches replies to requests by serial number, so
+    place_order can be called from several threads on one connection.
+    """
+    def _place(side: str, qty: int, price: float) -> str:
+        ret, resp = place_limit(trd, acc_id, code, side, qty, price)
+        if ret != 0:
+            return f"FAILED place {side} {qty}@{price}: {resp}"
+        oid = resp.iloc[0]["order_id"] if hasattr(resp, "iloc") else "?"
+        return f"PLACED {side} {qty}@{price} (order_id {oid})"
+
+    if len(planned) <= 1:
+        return [_place(*p) for p in planned]
+    with ThreadPoolExecutor(max_workers=min(4, len(planned))) as ex:
+        return list(ex.map(lambda p: _place(*p), planned))
+
+
+def _cached_acc_id(trd: OpenSecTradeContext, state: dict, *, refresh: bool = False) -> int:
+    # acc_id is constant for the test; cache it in state.
+    acc_id = state.get("acc_id")
+    if acc_id is None or refresh:
+        acc_id = get_sim_acc_id(trd)
+        state["acc_id"] = acc_id
+    return acc_id
+
+
+def report_end_of_test(trd: OpenSecTradeContext, args: argparse.Namespace, state: dict):
+    """Print the END_OF_TEST result line; needs the trade context only."""
+    acc_id = _cached_acc_id(trd, state, refresh=args.refresh_meta)
+    equity = _read_equity(trd, acc_id)
+    if state.get("initial_equity_hkd") is None:
+        state["initial_equity_hkd"] = equity
+    init_eq = state.get("initial_equity_hkd")
+    msg = {
+        "event": "END_OF_TEST",
+        "code": args.code,
+        # Derived from the timestamps so hand edits to end_ts are honoured.
+        "start": _iso_utc(state["start_ts"]),
+        "end": _iso_utc(state["end_ts"]),
+        "initial_equity_hkd": init_eq,
+        "final_equity_hkd": equity,
+    }
+    if init_eq and equity:
+        msg["return_pct"] = (equity / init_eq - 1.0) * 100
+    save_state(args.state, state)
+    print("STRATEGY_RESULT", json.dumps(msg, ensure_ascii=False))
 
 
 def main():
@@ -194,6 +333,11 @@ def main():
     ap.add_argument("--budget-hkd", type=float, default=1_000_000)
     ap.add_argument("--state", default="/Users/dylu/clawd/memory/strategy_baba_sim.json")
     ap.add_argument("--days", type=int, default=30)
+    ap.add_argument(
+        "--refresh-meta",
+        action="store_true",
+        help="re-query lot size and account id instead of using the values cached in --state",
+    )
     args = ap.parse_args()
 
     state = load_state(args.state)
@@ -209,78 +353,75 @@ def main():
             "sell_rule": "A: +5% sell 1/3, +10% sell 1/3, trailing stop 5% on remainder",
         }
 
-    # Connect trade
+    # Past the deadline only the final equity is needed: report and stop
+    # before any quote work.
+    if now_ts() >= int(state["end_ts"]):
+        trd = OpenSecTradeContext(filter_trdmarket=TrdMarket.HK, host=args.host, port=args.port)
+        try:
+            report_end_of_test(trd, args, state)
+        finally:
+            trd.close()
+        return
+
+    # Connect trade; the quote context is opened once and shared by every
+    # quote call below.
     trd = OpenSecTradeContext(filter_trdmarket=TrdMarket.HK, host=args.host, port=args.port)
+    q = None
+    subscribed = False
     try:
-        acc_id = get_sim_acc_id(trd)
+        acc_id = _cached_acc_id(trd, state, refresh=args.refresh_meta)
 
-        # equity snapshot (best-effort)
+        # equity snapshot (best-effort), only needed once for the baseline
         if state.get("initial_equity_hkd") is None:
-            try:
-                ret, df = trd.accinfo_query(trd_env=TrdEnv.SIMULATE, acc_id=acc_id)
-                if ret == 0 and not df.empty:
-                    # fields vary; try common ones
-                    for col in ["total_assets", "total_assets_hkd", "assets", "power"]:
-                        if col in df.columns:
-                            state["initial_equity_hkd"] = float(df.iloc[0][col])
-                            break
-            except Exception:
-                pass
-
-        # End condition
-        if now_ts() >= int(state["end_ts"]):
-            # compute current equity
-            equity = None
-            try:
-                ret, df = trd.accinfo_query(trd_env=TrdEnv.SIMULATE, acc_id=acc_id)
-                if ret == 0 and not df.empty:
-                    for col in ["total_assets", "total_assets_hkd", "assets", "power"]:
-                        if col in df.columns:
-                            equity = float(df.iloc[0][col])
-                            break
-            except Exception:
-                pass
-
-            init_eq = state.get("initial_equity_hkd")
-            msg = {
-                "event": "END_OF_TEST",
-                "code": args.code,
-                "start": datetime.fromtimestamp(start_ts).isoformat(),
-                "end": datetime.fromtimestamp(int(state["end_ts"])).isoformat(),
-                "initial_equity_hkd": init_eq,
-                "final_equity_hkd": equity,
-            }
-            if init_eq and equity:
-                msg["return_pct"] = (equity / init_eq - 1.0) * 100
-            save_state(args.state, state)
-            print("STRATEGY_RESULT", json.dumps(msg, ensure_ascii=False))
-            return
-
-        # Data + levels
-        k = get_kline(args.code, args.host, args.port, count=260)
-        k = k.sort_values("time_key")
-        # futu-api columns for kline are open/close/high/low (not *_price)
-        lows = k["low"].astype(float).tolist()
-        closes = k["close"].astype(float).tolist()
-
-        low20 = min(lows[-20:]) if len(lows) >= 20 else None
-        low50 = min(lows[-50:]) if len(lows) >= 50 else None
+            state["initial_equity_hkd"] = _read_equity(trd, acc_id)
+
+        q = OpenQuoteContext(host=args.host, port=args.port)
+        subscribe_kline(q, args.code)
+        subscribed = True
+
+        # Data + levels. Bars are cached next to the state file; a full refetch
+        # once a day picks up QFQ re-adjustments, other ticks fetch 5 bars.
+        today = datetime.now().date().isoformat()
+        kline_path = os.path.join(os.path.dirname(args.state), f"kline_{args.code}.parquet")
+        k, refreshed = get_kline_cached(q, args.code, kline_path, full=state.get("kline_full_date") != today)
+        if refreshed:
+            state["kline_full_date"] = today
+        # futu-api columns for kline are open/close/high/low (not *_price);
+        # only these three are used, so prune before sorting.
+        k = k[["time_key", "low", "close"]].sort_values("time_key", kind="mergesort")
+        lows = k["low"].to_numpy(np.float64, copy=False)
+        closes = k["close"].to_numpy(np.float64, copy=False)
+
+        low20 = lows[-20:].min() if len(lows) >= 20 else None
+        low50 = lows[-50:].min() if len(lows) >= 50 else None
         sma200 = sma(closes, 200)
-
-        last_price, upd = get_last_price(args.code, args.host, args.port)
-        lot = get_lot_size(args.code, args.host, args.port)
+        # Round each level once; the buckets and the summary both use these.
+        px20 = round_hk_price(low20) if low20 is not None else None
+        px50 = round_hk_price(low50) if low50 is not None else None
+        px200 = round_hk_price(sma200) if sma200 is not None else None
+
+        last_price, upd = get_last_price(q, args.code)
+        # lot_size is constant for the test; cache it in state.
+        lot = state.get("lot_size")
+        if lot is None or args.refresh_meta:
+            lot = get_lot_size(q, args.code)
+            if lot is not None:
+                state["lot_size"] = lot
+            else:
+                lot = 100  # fallback; not cached so the next run retries
 
         # Positions/orders
         pos = list_positions(trd, acc_id, args.code)
         orders = list_orders(trd, acc_id, args.code)
+        side_prices = active_side_prices(orders)
 
         holding_qty = 0
         avg_cost = None
         if not pos.empty:
-            holding_qty = int(float(pos.iloc[0].get("qty", 0)))
+            holding_qty = int(float(pos["qty"].iat[0])) if "qty" in pos.columns else 0
             # avg_cost might be cost_price
             if "cost_price" in pos.columns:
-                avg_cost = float(pos.iloc[0]["cost_price"])
+                avg_cost = float(pos["cost_price"].iat[0])
 
         actions: list[str] = []
 
@@ -296,19 +437,21 @@ def main():
         # BUY maintenance (only if not currently holding much; allow building position regardless)
         # Combine budgets when multiple support definitions collapse to the same rounded price
         raw_levels = [
-            ("LOW20", low20, args.budget_hkd * 0.30),
-            ("LOW50", low50, args.budget_hkd * 0.35),
-            ("SMA200", sma200, args.budget_hkd * 0.35),
+            ("LOW20", px20, args.budget_hkd * 0.30),
+            ("LOW50", px50, args.budget_hkd * 0.35),
+            ("SMA200", px200, args.budget_hkd * 0.35),
         ]
         buckets: dict[float, dict] = {}
-        for name, level, budget in raw_levels:
-            if level is None:
+        for name, px, budget in raw_levels:
+            if px is None:
                 continue
-            px = round_hk_price(float(level))
             b = buckets.setdefault(px, {"names": [], "budget": 0.0})
             b["names"].append(name)
-            b["budget"] += float(budget)
+            b["budget"] += budget
 
+        # Orders to place this tick: (action label, side, qty, price, note).
+        # Duplicate checks run first; placement is batched at the end.
+        planned: list[tuple[str, str, int, float, str]] = []
         for px, meta in sorted(buckets.items(), key=lambda x: x[0], reverse=True):
             budget = meta["budget"]
             names = "+".join(meta["names"])
@@ -316,9 +459,8 @@ def main():
             qty = (raw_qty // lot) * lot
             if qty < lot:
                 qty = lot
-            placed, info = ensure_order(trd, acc_id, orders, args.code, side="BUY", qty=qty, price=px)
-            if placed:
-                actions.append(f"{names}@{px}: {info}")
+            if needs_order(side_prices, side="BUY", qty=qty, price=px):
+                planned.append((f"{names}@{px}", "BUY", qty, px, ""))
 
         # SELL logic (Rule A)
         if holding_qty > 0 and avg_cost:
@@ -329,12 +471,10 @@ def main():
                 one_third = lot
 
             # Place TP1 and TP2 sells if not existing
-            placed, info = ensure_order(trd, acc_id, orders, args.code, side="SELL", qty=one_third, price=tp1)
-            if placed:
-                actions.append(f"TP1: {info}")
-            placed, info = ensure_order(trd, acc_id, orders, args.code, side="SELL", qty=one_third, price=tp2)
-            if placed:
-                actions.append(f"TP2: {info}")
+            if needs_order(side_prices, side="SELL", qty=one_third, price=tp1):
+                planned.append(("TP1", "SELL", one_third, tp1, ""))
+            if needs_order(side_prices, side="SELL", qty=one_third, price=tp2):
+                planned.append(("TP2", "SELL", one_third, tp2, ""))
 
             # Trailing stop on remainder
             mx = float(state.get("max_price_since_entry") or last_price)
@@ -345,12 +485,11 @@ def main():
             if remaining >= lot and last_price <= trail_trigger:
                 # Place a protective sell near market
                 px = round_hk_price(last_price * 0.995)
-                ret, resp = place_limit(trd, acc_id, args.code, "SELL", remaining, px)
-                if ret == 0:
-                    oid = resp.iloc[0]["order_id"]
-                    actions.append(f"TRAIL_STOP: PLACED SELL {remaining}@{px} (order_id {oid}) trigger<= {trail_trigger:.2f} (max {mx:.2f})")
-                else:
-                    actions.append(f"TRAIL_STOP: FAILED place SELL {remaining}@{px}: {resp}")
+                planned.append(("TRAIL_STOP", "SELL", remaining, px, f" trigger<= {trail_trigger:.2f} (max {mx:.2f})"))
+
+        infos = place_limits(trd, acc_id, args.code, [(side, qty, px) for _, side, qty, px, _ in planned])
+        for (label, *_, note), info in zip(planned, infos):
+            actions.append(f"{label}: {info}{note}")
 
         save_state(args.state, state)
 
@@ -359,8 +498,8 @@ def main():
             print("BABA_STRATEGY_ACTION")
             print(f"- Code: {args.code} (SIMULATE)")
             print(f"- Last: {last_price} HKD (update {upd})")
-            if low20 and low50 and sma200:
-                print(f"- Supports: low20 {round_hk_price(low20)} | low50 {round_hk_price(low50)} | sma200 {round_hk_price(sma200)}")
+            if px20 and px50 and px200:
+                print(f"- Supports: low20 {px20} | low50 {px50} | sma200 {px200}")
             print("- Actions:")
             for a in actions:
                 print(f"  - {a}")
@@ -369,6 +508,13 @@ def main():
             return
 
     finally:
+        if q is not None:
+            if subscribed:
+                try:
+                    q.unsubscribe([args.code], [SubType.K_DAY])
+                except Exception:
+                    pass
+            q.close()
         trd.close()
 
 